@@ -1,5 +1,6 @@
 
-from devices.SDG1032X import SDG1032X, BasicWaveParams
+from devices.SDG1032X import BasicWaveParams
+from devices.discovery import connect
 
 import sys
 import time
@@ -11,7 +12,7 @@ def print_BSWV(bswv, parameters):
 
 
 def main():
-    device = SDG1032X('10.0.0.229')
+    device = connect('SDG1032X')
     print("instance:", device.instance())
     print("     IDN:", device.IDN())
     print()
@@ -26,14 +27,11 @@ def main():
     # API objects for the Basic Wave operations
     bswvs = [device.BSWV(chan) for chan in [1,2]]
 
-    # Save a complete state of the channel's parameters into a dictionary. The states
-    # the channel's state coulf be easily restored from those.
-    bswv_params = {}
+    # Save a complete state of the instrument (both channels, including the output,
+    # modulation, sweep and burst settings). The state could be easily restored from it.
+    snapshot = device.snapshot()
     for bswv in bswvs:
-        chan = bswv.chan
-        bswv_params[chan] = bswv.save()
-        print_BSWV(bswv, bswv_params[chan])
-        bswv.restore(bswv_params[chan])
+        print_BSWV(bswv, bswv.save())
     print()
 
     # --- SINE ---
@@ -169,8 +167,9 @@ def main():
     time.sleep(2)
 
     # Restore inital parameters of the instrument that were saved earlier
+    for command in device.restore(snapshot):
+        print(command)
     for bswv in bswvs:
-        bswv.restore(bswv_params[bswv.chan])
         print(f'C{bswv.chan}:BSWV:', bswv)
 
 if __name__ == '__main__':
@@ -2,29 +2,25 @@
 # https://siglentna.com/wp-content/uploads/dlm_uploads/2017/10/ProgrammingGuide_forSDS-1-1.pdf
 # https://pyvisa.readthedocs.io/en/latest/introduction/example.html
 import matplotlib.pyplot as plt
-import pyvisa
+from devices.discovery import connect
 import sys
 import time
 
 def identify():
-    rm = pyvisa.ResourceManager()
-    print(rm.list_resources())
-    # ('TCPIP0::10.0.0.200::inst0::INSTR',)
-    
-    #inst = rm.open_resource('TCPIP0::10.0.0.3::inst0::INSTR')
-    inst = rm.open_resource('TCPIP0::10.0.0.111::INSTR')
+    device = connect('SDS824X HD')
+    print("instance:", device.instance())
+
+    inst = device.instr()
     print("session:", inst.session)
 
     print("default timeout [ms]:", inst.timeout)
-    inst.timeout = 2 * inst.timeout
 
     # Normally you needn’t worry about it. However, some devices
-    # don’t like to send data in chunks. So, we have to increase
-    # this. See details at:
+    # don’t like to send data in chunks. The chunk size and the timeout
+    # get tuned (see below) after the acquisition is stopped. See details at:
     # https://pyvisa.readthedocs.io/en/latest/introduction/resources.html#chunk-length
 
     print("default chunk_size [bytes]:", inst.chunk_size)
-    inst.chunk_size = 100 * inst.chunk_size
 
     print(inst.query("*IDN?"))
     # *SIGLENT,SDS1102X,SDS1XDCC1L4001,1.1.2.15 R10
@@ -78,6 +74,10 @@ def identify():
     time.sleep(1)
     print(inst.query("ACQUIRE_WAY?"))
 
+    # Measure the throughput, pick the best chunk size, and derive the timeout
+    # and the sparsing from the size of the waveform.
+    print("transfer:", device.tune(chan=1))
+
     # Query the waveform setup
     print(inst.query("WAVEFORM_SETUP?"))
 
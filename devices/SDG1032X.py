@@ -1,4 +1,5 @@
 from .device import Device
+import json
 import pyvisa
 import sys
 import time
@@ -297,6 +298,133 @@ class BasicWaveParams:
 
 
 
+class Snapshot:
+
+    '''
+    A snapshot of the state of the instrument: the basic wave, the selected arbitrary
+    wave, modulation, sweep, burst and output parameters of the channels. The values
+    are kept as they are reported by the instrument (with units) and written back
+    the same way. Only the basic wave parameters listed in BasicWaveParams.keys for
+    the type of the wave are written back.
+
+    Public instance members:
+      data:     {chan: {subsystem: {key: value}}}
+
+    Public class members:
+      subsystems:   The subsystems in the order they are restored
+      groups:       The names which introduce groups of parameters in responses of
+                    the subsystems (e.g. "MDWV STATE,ON,AM,SRC,INT,...")
+      derived:      The basic wave parameters of BasicWaveParams.keys which are
+                    the alternative forms of the other ones, and aren't written
+                    along with them
+    '''
+
+    subsystems = ['BSWV', 'ARWV', 'MDWV', 'SWWV', 'BTWV', 'OUTP']
+
+    groups = ['AM', 'DSBAM', 'FM', 'PM', 'PWM', 'ASK', 'FSK', 'PSK', 'CARR']
+
+    derived = {
+        'PERI'   : 'FRQ',
+        'AMPVRMS': 'AMP',
+        'HLEV'   : 'AMP',
+        'LLEV'   : 'AMP'
+    }
+
+    def __init__(self, data):
+        self.data = data
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.data, f, separators=(',', ':'))
+
+    @staticmethod
+    def load(path):
+        with open(path) as f:
+            return Snapshot({int(chan): subsystems for chan, subsystems in json.load(f).items()})
+
+    @staticmethod
+    def parse(response):
+        '''
+        Parse a response like "C1:MDWV STATE,ON,AM,SRC,INT,FRQ,100HZ,CARR,WVTP,SINE,..."
+        into a dictionary {"STATE": "ON", "AM,SRC": "INT", "AM,FRQ": "100HZ"}. Parameters
+        of the carrier are skipped since they repeat the basic wave. The leading value
+        of "C1:OUTP ON,LOAD,HZ,..." is stored as "STATE".
+        '''
+        tokens = response.split(maxsplit=1)[1].split(",")
+        params = {}
+        if tokens[0] in ('ON', 'OFF'):
+            params['STATE'] = tokens.pop(0)
+        group = ''
+        i = 0
+        while i < len(tokens):
+            if tokens[i] in Snapshot.groups:
+                if tokens[i] == 'CARR': break
+                group = tokens[i] + ","
+                i += 1
+                continue
+            if i + 1 < len(tokens): params[group + tokens[i]] = tokens[i + 1]
+            i += 2
+        return params
+
+    def diff(self, current):
+        '''
+        Return the ordered list of commands turning the current snapshot into this one.
+        The outputs to be turned off are switched first, then all channels are configured,
+        and the outputs to be turned on are switched last.
+        '''
+        off, commands, on = [], [], []
+        for chan, subsystems in self.data.items():
+            for subsystem in Snapshot.subsystems:
+                if subsystem not in subsystems: continue
+                # The selected arbitrary wave matters only if the wave is arbitrary
+                if subsystem == 'ARWV' and subsystems.get('BSWV', {}).get('WVTP') != 'ARB': continue
+                target = subsystems[subsystem]
+                actual = current.data.get(chan, {}).get(subsystem, {})
+                prefix = f"C{chan}:{subsystem}"
+                if subsystem == 'OUTP':
+                    state = target.get('STATE')
+                    if state is not None and state != actual.get('STATE'):
+                        (on if state == 'ON' else off).append(f"{prefix} {state}")
+                    target = {key: val for key, val in target.items() if key != 'STATE'}
+                commands += Snapshot._diff(prefix, subsystem, target, actual)
+        return off + commands + on
+
+    # ----------------------
+    # Implementation details
+    # ----------------------
+
+    @staticmethod
+    def _diff(prefix, subsystem, target, actual):
+        if subsystem == 'BSWV':
+            # Changing the type of the wave resets its parameters
+            if target.get('WVTP') != actual.get('WVTP'): actual = {}
+            keys = ['WVTP'] + BasicWaveParams.keys.get(target.get('WVTP'), [])
+            target = {key: val for key, val in target.items() if key in keys}
+            changed = [(key, val) for key, val in target.items()
+                       if actual.get(key) != val and Snapshot.derived.get(key) not in target]
+            changed.sort(key=lambda kv: kv[0] != 'WVTP')
+            return [f"{prefix} " + ",".join(f"{key},{val}" for key, val in changed)] if changed else []
+
+        if subsystem == 'ARWV':
+            # The wave is selected by the name, which is reported for both the built-in
+            # and the user defined waves
+            name = target.get('NAME')
+            return [f"{prefix} NAME,{name}"] if name is not None and name != actual.get('NAME') else []
+
+        state = target.get('STATE')
+        changed = [(key, val) for key, val in target.items() if key != 'STATE' and actual.get(key) != val]
+        commands = []
+        if state == 'OFF':
+            # Parameters of the disabled subsystems don't matter
+            changed = []
+        if changed:
+            commands.append(f"{prefix} " + ",".join(f"{key},{val}" for key, val in changed))
+        if state is not None and state != actual.get('STATE'):
+            commands.append(f"{prefix} STATE,{state}")
+        return commands
+
+
+
 class SDG1032X(Device):
 
     '''
@@ -315,9 +443,27 @@ class SDG1032X(Device):
         https://siglentna.com/USA_website_2014/Documents/Program_Material/SDG_ProgrammingGuide_PG_E03B.pdf
     '''
 
-    def __init__(self, ipaddr, verbose=False):
-        super().__init__(ipaddr, 'SDG1032X', verbose)
+    def __init__(self, ipaddr, verbose=False, instr=None):
+        super().__init__(ipaddr, 'SDG1032X', verbose, instr)
 
     def STATUS_PRESET(self): self.instr().write("STATUS:PRESET")
 
     def BSWV(self, chan=1): return BasicWaveParams(self, chan)
+
+    def snapshot(self, chans=(1, 2)):
+        '''
+        Capture the state of the channels.
+        '''
+        return Snapshot({chan: {subsystem: Snapshot.parse(self.instr().query(f"C{chan}:{subsystem}?").strip())
+                                for subsystem in Snapshot.subsystems}
+                         for chan in chans})
+
+    def restore(self, snapshot):
+        '''
+        Bring the instrument into the state captured by the snapshot. Only the parameters
+        which differ from the current state are written. Return the list of the commands.
+        '''
+        commands = snapshot.diff(self.snapshot(tuple(snapshot.data.keys())))
+        for command in commands:
+            self.instr().write(command)
+        return commands
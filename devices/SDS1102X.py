@@ -1,5 +1,9 @@
 from .device import Device
+import math
+import numpy as np
 import pyvisa
+import re
+import struct
 
 class SDS1102X(Device):
     '''
@@ -20,7 +24,194 @@ class SDS1102X(Device):
         https://siglentna.com/wp-content/uploads/dlm_uploads/2017/10/ProgrammingGuide_forSDS-1-1.pdf
     '''
 
-    def __init__(self, ipaddr, verbose=False):
-        super().__init__(ipaddr, 'SDS1102X', verbose)
+    def __init__(self, ipaddr, verbose=False, name='SDS1102X', instr=None):
+        super().__init__(ipaddr, name, verbose, instr)
 
     def STATUS_PRESET(self): self.instr().write("STATUS:PRESET")
+
+    # ----------------------------------
+    # Waveform transfer setup and tuning
+    # ----------------------------------
+
+    def WAVEFORM_SETUP(self, **kwargs):
+        '''
+        Set the parameters SP (sparsing), NP (number of points, 0 for all points) and
+        FP (first point) of the waveform transfers passed as keyword arguments.
+        Return a dictionary of the current parameters if called with no arguments.
+        '''
+        if kwargs:
+            self.instr().write("WAVEFORM_SETUP {}".format(",".join(f"{k},{v}" for k, v in kwargs.items())))
+            return None
+        foldedParams = self.instr().query("WAVEFORM_SETUP?").split()[1].split(",")
+        return {foldedParams[i]: int(foldedParams[i + 1]) for i in range(0, len(foldedParams), 2)}
+
+    def SANU(self, chan=1):
+        '''
+        Return the number of points in the memory of the channel.
+        '''
+        return int(_number(self.instr().query("SANU? C{}".format(chan))))
+
+    def tune(self, chan=1, points=None, budget=None, probe_points=2 * 1024 * 1024):
+        '''
+        Tune the transfers of the waveform of the stopped acquisition of the channel.
+        The throughput is measured for a few chunk sizes on a fragment of the waveform
+        of up to 'probe_points' points (and no more than 'points'), and the fastest chunk
+        size is set. Only the chunk sizes which split the fragment into a few reads are
+        measured. The sparsing is then chosen for the transfer to have at most 'points'
+        points, and/or to last at most 'budget' seconds at the measured bandwidth.
+        The timeout is derived from the expected size of the transfer.
+
+        Return a dictionary of the chosen parameters: SP, NP, chunk_size, timeout and
+        bandwidth [bytes/s].
+        '''
+        total = self.SANU(chan)
+        probe = min(total, probe_points, total if points is None else max(1, points))
+        self.WAVEFORM_SETUP(SP=1, NP=probe, FP=0)
+        # Up to 2 bytes per point
+        chunk_size, nbytes = self.tune_chunk_size("C{}:WF? DAT2".format(chan), max_bytes=2 * probe)
+        bytes_per_point = max(1, round(nbytes / max(1, probe)))
+
+        limit = total
+        if points is not None: limit = min(limit, points)
+        if budget is not None: limit = min(limit, int(budget * self.bandwidth() / bytes_per_point))
+        SP = max(1, math.ceil(total / max(1, limit)))
+        NP = math.ceil(total / SP)
+        self.WAVEFORM_SETUP(SP=SP, NP=NP, FP=0)
+        return {
+            'SP'        : SP,
+            'NP'        : NP,
+            'chunk_size': chunk_size,
+            'timeout'   : self.tune_timeout(NP * bytes_per_point),
+            'bandwidth' : self.bandwidth()
+        }
+
+
+    # ----------------------------------------------
+    # Fetching waveforms, or the regions of interest
+    # ----------------------------------------------
+
+    # The offsets and the formats of the fields of the waveform descriptor (WAVEDESC)
+    # returned by WF? DESC.
+    descriptor = {
+        'COMM_TYPE'       : (32,  'h'),     # 0 - bytes, 1 - words
+        'COMM_ORDER'      : (34,  'h'),     # 0 - big endian, 1 - little endian
+        'WAVE_ARRAY_1'    : (60,  'i'),
+        'WAVE_ARRAY_COUNT': (116, 'i'),
+        'FIRST_POINT'     : (132, 'i'),
+        'SPARSING_FACTOR' : (136, 'i'),
+        'VERTICAL_GAIN'   : (156, 'f'),
+        'VERTICAL_OFFSET' : (160, 'f'),
+        'HORIZ_INTERVAL'  : (176, 'f'),
+        'HORIZ_OFFSET'    : (180, 'd')
+    }
+
+    def WF_DESC(self, chan=1):
+        '''
+        Return a dictionary of the fields of the waveform descriptor of the channel.
+        '''
+        self.instr().write("C{}:WF? DESC".format(chan))
+        data = _block(self.instr().read_raw())
+        order = '<' if data[34:36] == b'\x01\x00' else '>'
+        return {key: struct.unpack_from(order + fmt, data, offset)[0]
+                for key, (offset, fmt) in SDS1102X.descriptor.items()}
+
+    def waveform(self, chan=1, start=None, stop=None, SP=1, desc=None):
+        '''
+        Fetch the samples of the stopped acquisition of the channel within the time window
+        [start, stop] [s] relative to the trigger, taking every SP-th point. The whole record
+        is fetched if the window isn't specified. Only the requested points are transferred
+        by the instrument.
+
+        Return two numpy arrays: the times [s] and the voltages [V] of the samples. The arrays
+        are empty if the window is outside of the record.
+        '''
+        if desc is None: desc = self.WF_DESC(chan)
+        FP, NP = self._window(chan, start, stop, SP, desc)
+        # NP=0 would make the instrument send all points
+        if NP == 0: return self._samples(desc, np.empty(0, dtype=np.int64), np.empty(0))
+        return self._samples(desc, *self._fetch(chan, FP, NP, SP, desc))
+
+    def progressive(self, chan=1, windows=(), overview_points=10000):
+        '''
+        Fetch a sparse overview of the record of the channel with at most 'overview_points'
+        points, then the windows of interest at the full resolution. The windows are given
+        as a sequence of pairs (start, stop) [s] relative to the trigger, or as a function
+        which is called with the times and the voltages of the overview and returns such
+        a sequence. The overview points within the windows are replaced with the refined
+        ones.
+
+        Return two numpy arrays: the times [s] and the voltages [V] of the samples, sorted
+        by time.
+        '''
+        desc = self.WF_DESC(chan)
+        total = self.SANU(chan)
+        SP = max(1, math.ceil(total / max(1, overview_points)))
+        index, codes = self._fetch(chan, 0, math.ceil(total / SP), SP, desc)
+        if callable(windows): windows = windows(*self._samples(desc, index, codes))
+
+        keep = np.ones(len(index), dtype=bool)
+        indexes, codes_ = [], []
+        for start, stop in windows:
+            FP, NP = self._window(chan, start, stop, 1, desc, total)
+            if NP == 0: continue
+            keep &= (index < FP) | (index >= FP + NP)
+            i, c = self._fetch(chan, FP, NP, 1, desc)
+            indexes.append(i)
+            codes_.append(c)
+        index, first = np.unique(np.concatenate([index[keep]] + indexes), return_index=True)
+        codes = np.concatenate([codes[keep]] + codes_)[first]
+        return self._samples(desc, index, codes)
+
+    # ----------------------
+    # Implementation details
+    # ----------------------
+
+    def _window(self, chan, start, stop, SP, desc, total=None):
+        '''
+        Translate the time window into the first point and the number of points to be sent.
+        Only the points within the window, including its bounds, are sent.
+        '''
+        if total is None: total = self.SANU(chan)
+        offset, interval = desc['HORIZ_OFFSET'], desc['HORIZ_INTERVAL']
+        # Tolerate the rounding of the interval stored as float32 in the descriptor
+        epsilon = 1e-6
+        first = 0 if start is None else max(0, math.ceil((start - offset) / interval - epsilon))
+        last = total if stop is None else min(total, math.floor((stop - offset) / interval + epsilon) + 1)
+        return first, max(0, math.ceil((last - first) / SP))
+
+    def _fetch(self, chan, FP, NP, SP, desc):
+        '''
+        Fetch the points of the record. Return the indexes of the points within the record
+        and the raw ADC codes.
+        '''
+        self.WAVEFORM_SETUP(SP=SP, NP=NP, FP=FP)
+        self.instr().write("C{}:WF? DAT2".format(chan))
+        data = _block(self.instr().read_raw())
+        order = '<' if desc['COMM_ORDER'] == 1 else '>'
+        codes = np.frombuffer(data, dtype=np.dtype(order + ('i2' if desc['COMM_TYPE'] == 1 else 'i1')))
+        if self._verbose: print(f"{self.instance()}: C{chan} FP {FP} NP {NP} SP {SP}: {len(data)} bytes")
+        return FP + SP * np.arange(len(codes), dtype=np.int64), codes
+
+    @staticmethod
+    def _samples(desc, index, codes):
+        times = desc['HORIZ_OFFSET'] + index * float(desc['HORIZ_INTERVAL'])
+        volts = codes * float(desc['VERTICAL_GAIN']) - desc['VERTICAL_OFFSET']
+        return times, volts
+
+
+def _block(response):
+    '''
+    Extract the payload of the IEEE 488.2 definite length block from a response
+    like "C1:WF DAT2,#9000001000<data>".
+    '''
+    start = response.index(b'#')
+    ndigits = int(response[start + 1:start + 2])
+    length = int(response[start + 2:start + 2 + ndigits])
+    return response[start + 2 + ndigits:start + 2 + ndigits + length]
+
+
+def _number(response):
+    '''
+    Extract the first number from a response like "SANU 1.40E+04pts".
+    '''
+    return float(re.search(r"[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?", response.split()[-1]).group())
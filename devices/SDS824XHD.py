@@ -0,0 +1,21 @@
+from .SDS1102X import SDS1102X
+
+class SDS824XHD(SDS1102X):
+    '''
+    SDS824X HD - SDS800X HD Series Digital Storage Oscilloscope.
+    General specs:
+        200 MHz bandwidth model
+        Real-time sampling rate up to 2 GSa/s
+        Vertical resolution: 12-bit
+        Record length up to 50 Mpts
+        Channels: 4 CH
+
+    The instrument still accepts the legacy SDS1000X commands used by the scripts
+    (WF? DESC/DAT2, WAVEFORM_SETUP, etc.), except for ALL_STATUS?.
+
+    More info at:
+        https://siglentna.com/digital-oscilloscopes/sds800x-hd-series-digital-storage-oscilloscopes/
+    '''
+
+    def __init__(self, ipaddr, verbose=False, instr=None):
+        super().__init__(ipaddr, verbose, 'SDS824X HD', instr)
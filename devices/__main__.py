@@ -0,0 +1,281 @@
+'''
+The command line interface for the lab instruments.
+
+    python -m devices idn [--model MODEL] [--server [--socket PATH]]
+    python -m devices capture [--model MODEL] [--chan N] [--start S] [--stop S] [--points N] [--output FILE] [--plot] [--server [--socket PATH]]
+    python -m devices bswv [--model MODEL] save|restore CHAN FILE [--server [--socket PATH]]
+    python -m devices sweep [--model MODEL] [--chan N] [--start HZ] [--stop HZ] [--time S] [--mode LINE|LOG] [--off] [--server [--socket PATH]]
+    python -m devices serve [--socket PATH]
+
+The instruments are located with the discovery cache (see devices.discovery). The heavy
+modules (pyvisa, numpy, matplotlib) are imported only by the commands which need them.
+Any command could be run with the option --server to be executed by a running 'serve'
+process, which keeps the connections to the instruments open between the commands.
+The command is executed locally if no server is running.
+'''
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import signal
+import socket
+import sys
+import tempfile
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), f"electronic-lab-{os.getuid()}.sock")
+
+
+class Context:
+
+    '''
+    The connections to the instruments made by the commands. The connections are
+    made on the first use, and kept open for the lifetime of the context, or until
+    they're dropped after a failure.
+    '''
+
+    def __init__(self):
+        self._devices = {}
+        self._used = set()          # the models used since the last call of begin()
+
+    def device(self, model):
+        if model not in self._devices:
+            from .discovery import connect
+            self._devices[model] = connect(model)
+        self._used.add(model)
+        return self._devices[model]
+
+    def begin(self):
+        '''
+        Start tracking the devices used by the next command.
+        '''
+        self._used.clear()
+
+    def drop(self):
+        '''
+        Close and forget the devices used by the command, so that the next command
+        reconnects to them.
+        '''
+        for model in self._used:
+            try:
+                self._devices.pop(model).instr().close()
+            except Exception:
+                pass
+        self._used.clear()
+
+
+# --------
+# Commands
+# --------
+
+def idn(context, args):
+    if args.model is None:
+        from .discovery import Registry
+        for model, instrument in Registry().instruments().items():
+            print(f"{instrument['ipaddr']}\t{model}\t{instrument['serial']}\t{instrument['firmware']}")
+        return
+    device = context.device(args.model)
+    print(device.instance(), device.IDN())
+
+
+def capture(context, args):
+    import numpy as np
+    device = context.device(args.model or 'SDS1102X')
+    SP = 1
+    if args.points is not None: SP = device.tune(args.chan, points=args.points)['SP']
+    times, volts = device.waveform(args.chan, args.start, args.stop, SP)
+    if args.output is not None:
+        np.save(args.output, np.stack((times, volts)))
+    print(f"C{args.chan}: {len(times)} points, {times[0] if len(times) else 0:.9g} .. {times[-1] if len(times) else 0:.9g} s")
+    if args.plot:
+        import matplotlib.pyplot as plt
+        plt.plot(times, volts)
+        plt.show()
+
+
+def bswv(context, args):
+    bswv = context.device(args.model or 'SDG1032X').BSWV(args.chan)
+    if args.action == 'save':
+        with open(args.file, 'w') as f:
+            json.dump(bswv.save(), f, indent=2)
+    else:
+        with open(args.file) as f:
+            bswv.restore(json.load(f))
+    print(f"C{bswv.chan} BSWV {bswv}")
+
+
+def sweep(context, args):
+    device = context.device(args.model or 'SDG1032X')
+    if args.off:
+        device.instr().write(f"C{args.chan}:SWWV STATE,OFF")
+    else:
+        device.instr().write(f"C{args.chan}:SWWV START,{args.start},STOP,{args.stop},TIME,{args.time},SWMD,{args.mode}")
+        device.instr().write(f"C{args.chan}:SWWV STATE,ON")
+    print(device.instr().query(f"C{args.chan}:SWWV?").strip())
+
+
+def serve(context, args):
+    if os.path.exists(args.socket):
+        if _live(args.socket):
+            sys.exit(f"a server is already running at {args.socket}")
+        os.unlink(args.socket)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(args.socket)
+        # Let the socket be removed when the server is terminated
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        try:
+            _serve(context, server, args.socket)
+        finally:
+            os.unlink(args.socket)
+
+
+# ----------------------
+# Implementation details
+# ----------------------
+
+def _serve(context, server, path):
+    server.listen()
+    print(f"listening at {path}", flush=True)
+    while True:
+        connection, _ = server.accept()
+        # A broken request or a disconnected client mustn't stop the server
+        try:
+            with connection, connection.makefile('rwb') as stream:
+                request = stream.readline()
+                # The client disconnected, e.g. after checking if the server is live
+                if not request: continue
+                try:
+                    argv = json.loads(request)['argv']
+                except (ValueError, KeyError, TypeError) as e:
+                    status, output = 2, f"bad request: {type(e).__name__}: {e}\n"
+                else:
+                    status, output = _execute(context, argv)
+                stream.write((json.dumps({'status': status, 'output': output}) + "\n").encode())
+        except OSError as e:
+            print(f"connection failed: {e}", file=sys.stderr, flush=True)
+
+
+def _live(path):
+    '''
+    Return True if a server is listening at the socket.
+    '''
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        try:
+            client.connect(path)
+            return True
+        except OSError:
+            return False
+
+
+def _parser():
+    parser = argparse.ArgumentParser(prog='python -m devices', description="Lab instruments")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    sock = argparse.ArgumentParser(add_help=False)
+    sock.add_argument('--socket', default=DEFAULT_SOCKET, help="the socket of the 'serve' process")
+
+    instrument = argparse.ArgumentParser(add_help=False, parents=[sock])
+    instrument.add_argument('--model', help="the model of the instrument as reported by *IDN?")
+    instrument.add_argument('--server', action='store_true', help="execute the command by the running 'serve' process")
+
+    command = commands.add_parser('idn', parents=[instrument], help="identify the instrument, or list the discovered ones")
+    command.set_defaults(handler=idn)
+
+    command = commands.add_parser('capture', parents=[instrument], help="fetch a waveform from the oscilloscope")
+    command.add_argument('--chan', type=int, default=1)
+    command.add_argument('--start', type=float, help="the beginning of the window relative to the trigger [s]")
+    command.add_argument('--stop', type=float, help="the end of the window relative to the trigger [s]")
+    command.add_argument('--points', type=int, help="the max number of points of the record")
+    command.add_argument('--output', type=os.path.abspath, help="the .npy file for the times and the voltages")
+    command.add_argument('--plot', action='store_true')
+    command.set_defaults(handler=capture)
+
+    command = commands.add_parser('bswv', parents=[instrument], help="save or restore the basic wave parameters of the generator")
+    command.add_argument('action', choices=['save', 'restore'])
+    command.add_argument('chan', type=int)
+    command.add_argument('file', type=os.path.abspath)
+    command.set_defaults(handler=bswv)
+
+    command = commands.add_parser('sweep', parents=[instrument], help="set up the frequency sweep of the generator")
+    command.add_argument('--chan', type=int, default=1)
+    command.add_argument('--start', type=float, default=100.0, help="[Hz]")
+    command.add_argument('--stop', type=float, default=1000.0, help="[Hz]")
+    command.add_argument('--time', type=float, default=1.0, help="[s]")
+    command.add_argument('--mode', choices=['LINE', 'LOG'], default='LINE')
+    command.add_argument('--off', action='store_true', help="turn the sweep off")
+    command.set_defaults(handler=sweep)
+
+    command = commands.add_parser('serve', parents=[sock], help="keep the connections open and execute the commands sent with --server")
+    command.set_defaults(handler=serve)
+
+    return parser
+
+
+def _execute(context, argv):
+    '''
+    Execute the command on behalf of a client. Return the exit status and the output.
+    '''
+    output = io.StringIO()
+    context.begin()
+    with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+        try:
+            args = _parser().parse_args(argv)
+            args.handler(context, args)
+            return 0, output.getvalue()
+        except SystemExit as e:
+            return e.code or 0, output.getvalue()
+        except Exception as e:
+            # The connection may be broken (e.g. the instrument was rebooted)
+            if _connection_error(e): context.drop()
+            return 1, output.getvalue() + f"{type(e).__name__}: {e}\n"
+
+
+def _connection_error(e):
+    pyvisa = sys.modules.get('pyvisa')
+    return isinstance(e, OSError) or (pyvisa is not None and isinstance(e, pyvisa.errors.Error))
+
+
+def _forward(path, argv):
+    '''
+    Send the command to the 'serve' process. Return the exit status, or None
+    if no server is running at the socket.
+    '''
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        try:
+            client.connect(path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            return None
+        with client.makefile('rwb') as stream:
+            stream.write((json.dumps({'argv': argv}) + "\n").encode())
+            stream.flush()
+            response = json.loads(stream.readline())
+    sys.stdout.write(response['output'])
+    return response['status']
+
+
+def main(argv=None):
+    if argv is None: argv = sys.argv[1:]
+    args = _parser().parse_args(argv)
+    if getattr(args, 'server', False):
+        # The argument list is re-parsed by the server, with the paths made absolute
+        forwarded = []
+        skip = False
+        for a in argv:
+            if skip: skip = False
+            elif a == '--server' or a.startswith('--socket='): pass
+            elif a == '--socket': skip = True
+            else: forwarded.append(a)
+        for name in ('output', 'file'):
+            value = getattr(args, name, None)
+            if value is not None:
+                forwarded = [value if os.path.abspath(a) == value else a for a in forwarded]
+        status = _forward(args.socket, forwarded)
+        if status is not None: return status
+        print(f"no server running at {args.socket}, executing the command locally", file=sys.stderr)
+    args.handler(Context(), args)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,7 @@
 import pyvisa
+import time
+
+from .session import Recorder
 
 class Device:
 
@@ -7,12 +10,21 @@ class Device:
     and operations common to all devices adhering to the standard VISA (VXI-11).
     '''
 
-    def __init__(self, ipaddr, name, verbose=False):
+    def __init__(self, ipaddr, name, verbose=False, instr=None):
+        '''
+        The optional parameter 'instr' allows to substitute a replacement of
+        the VISA resource, such as session.Replay. No connection to the instrument
+        is made in this case.
+        '''
         self._ipaddr = ipaddr
         self._name = name
         self._verbose = verbose
-        self._rm = pyvisa.ResourceManager()
-        self._instr = self._rm.open_resource("TCPIP0::{}".format(ipaddr))
+        self._rm = None
+        self._instr = instr
+        self._bandwidth = None      # measured transfer rate [bytes/s]
+        if self._instr is None:
+            self._rm = pyvisa.ResourceManager()
+            self._instr = self._rm.open_resource("TCPIP0::{}".format(ipaddr))
 
     def instance(self): return "{}@{}".format(self._name, self._ipaddr)
     def instr(self): return self._instr
@@ -20,3 +32,79 @@ class Device:
 
     def RST(self): self._instr.write("*RST")
     def CLS(self): self._instr.write("*CLS")
+
+    def record(self, path):
+        '''
+        Start recording all operations with the instrument into the file.
+        The recording is finished by stop_recording(), or when the resource is closed.
+        '''
+        self._instr = Recorder(self._instr, path)
+        return self._instr
+
+    def stop_recording(self):
+        '''
+        Finish the recording, keeping the connection with the instrument open.
+        '''
+        if isinstance(self._instr, Recorder): self._instr = self._instr.detach()
+
+    # ----------------------------------------
+    # Tuning parameters of the data transfers.
+    # ----------------------------------------
+
+    def bandwidth(self): return self._bandwidth
+
+    def measure_throughput(self, command, chunk_size):
+        '''
+        Send the command and read the whole response using the chunk size.
+        Return the number of bytes received and the elapsed time [s].
+        '''
+        self._instr.chunk_size = chunk_size
+        start = time.perf_counter()
+        self._instr.write(command)
+        nbytes = len(self._instr.read_raw())
+        return nbytes, time.perf_counter() - start
+
+    # The candidate chunk sizes [bytes] tried by tune_chunk_size()
+    chunk_sizes = (20 * 1024, 100 * 1024, 1024 * 1024, 4 * 1024 * 1024)
+
+    # The pessimistic transfer rate [bytes/s] for the timeout of the measurements
+    min_bandwidth = 256 * 1024
+
+    def tune_chunk_size(self, command, chunk_sizes=None, min_chunks=2, max_bytes=None):
+        '''
+        Measure the throughput of the command for each chunk size, and set the fastest one.
+        The command is expected to return the same response each time (e.g. a waveform of
+        the stopped acquisition). The chunk sizes exceeding 1/min_chunks of the response are
+        skipped, since the response would be received in a single read regardless of them.
+        The smallest chunk size is always measured. If the upper limit of the size of the
+        response 'max_bytes' is known then the timeout is raised for the measurements to
+        complete at the pessimistic transfer rate. Return the best chunk size and the size
+        of the response [bytes].
+        '''
+        chunk_sizes = sorted(chunk_sizes or Device.chunk_sizes)
+        if max_bytes is not None:
+            chunk_sizes = chunk_sizes[:1] + [c for c in chunk_sizes[1:] if c * min_chunks <= max_bytes]
+            self._instr.timeout = max(self._instr.timeout, int(2000 * max_bytes / Device.min_bandwidth))
+        best = None
+        nbytes = None
+        for chunk_size in chunk_sizes:
+            if nbytes is not None and chunk_size * min_chunks > nbytes: break
+            nbytes, elapsed = self.measure_throughput(command, chunk_size)
+            bandwidth = nbytes / max(elapsed, 1e-9)
+            if self._verbose: print(f"{self.instance()}: chunk_size {chunk_size} bytes: {bandwidth:.0f} bytes/s")
+            if best is None or bandwidth > self._bandwidth:
+                best = chunk_size
+                self._bandwidth = bandwidth
+        self._instr.chunk_size = best
+        return best, nbytes
+
+    def tune_timeout(self, nbytes, margin=2.0, min_timeout=2000):
+        '''
+        Set the timeout [ms] sufficient for receiving the number of bytes at the measured
+        bandwidth, multiplied by the safety margin. Return the timeout.
+        '''
+        context = f"{__class__.__name__}.tune_timeout"
+        if self._bandwidth is None:
+            raise RuntimeError(f"{context}: the bandwidth hasn't been measured")
+        self._instr.timeout = max(min_timeout, int(1000 * margin * nbytes / self._bandwidth))
+        return self._instr.timeout
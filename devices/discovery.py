@@ -0,0 +1,191 @@
+'''
+Discovery of the lab instruments on the local network.
+
+Instruments are located by probing the VXI-11 portmapper (TCP port 111) of every
+host of a subnet in parallel. Each responder is identified with *IDN? and the model
+reported by the instrument is mapped to the matching Device subclass. The results
+are kept in a cache file, so that a subsequent startup could connect right away
+and re-probe the network only if the cached address no longer works.
+
+Typical use:
+
+    from devices.discovery import connect
+    device = connect('SDG1032X')
+'''
+
+import concurrent.futures
+import importlib
+import ipaddress
+import json
+import os
+import socket
+import time
+
+DEFAULT_SUBNET = '10.0.0.0/24'
+DEFAULT_CACHE  = os.path.join(os.path.expanduser('~'), '.cache', 'electronic-lab', 'instruments.json')
+DEFAULT_TTL    = 24 * 3600      # [s]
+
+PORTMAPPER_PORT = 111
+
+# The model names (as reported by *IDN?) and the corresponding Device subclasses.
+# The classes are imported when needed.
+models = {
+    'SDG1032X'  : ('SDG1032X',  'SDG1032X'),
+    'SDS1102X'  : ('SDS1102X',  'SDS1102X'),
+    'SDS824X HD': ('SDS824XHD', 'SDS824XHD'),
+}
+
+
+def device_class(model):
+    '''
+    Return the Device subclass for the model name reported by *IDN?.
+    '''
+    context = "discovery.device_class"
+    if model not in models:
+        raise KeyError(f"{context}: unsupported model: {model}")
+    module, name = models[model]
+    return getattr(importlib.import_module(f".{module}", __package__), name)
+
+
+def probe(ipaddr, timeout=0.2):
+    '''
+    Return True if the host has the VXI-11 portmapper listening.
+    '''
+    try:
+        with socket.create_connection((str(ipaddr), PORTMAPPER_PORT), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def identify(ipaddr, timeout=1.0):
+    '''
+    Query *IDN? of the instrument at the address. Return a dictionary with keys
+    'ipaddr', 'vendor', 'model', 'serial', 'firmware', or None if the host
+    didn't respond in time.
+    '''
+    import pyvisa
+    try:
+        rm = pyvisa.ResourceManager()
+        instr = rm.open_resource(f"TCPIP0::{ipaddr}", open_timeout=int(1000 * timeout))
+        try:
+            instr.timeout = int(1000 * timeout)
+            idn = instr.query("*IDN?").strip()
+        finally:
+            instr.close()
+    except (pyvisa.errors.VisaIOError, OSError):
+        return None
+    fields = [f.strip() for f in idn.split(',')] + [''] * 4
+    return {
+        'ipaddr'  : str(ipaddr),
+        'vendor'  : fields[0].lstrip('*'),
+        'model'   : fields[1],
+        'serial'  : fields[2],
+        'firmware': fields[3]
+    }
+
+
+def scan(subnet=DEFAULT_SUBNET, timeout=0.2, max_workers=64):
+    '''
+    Probe all hosts of the subnet in parallel and identify the responders.
+    Return a list of the dictionaries produced by identify().
+    '''
+    hosts = list(ipaddress.ip_network(subnet, strict=False).hosts())
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+        alive = [h for h, ok in zip(hosts, pool.map(lambda h: probe(h, timeout), hosts)) if ok]
+        found = list(pool.map(lambda h: identify(h, 5 * timeout), alive))
+    return [idn for idn in found if idn is not None]
+
+
+class Registry:
+
+    '''
+    The cache of the discovered instruments.
+
+    Public instance members:
+      path:     The cache file
+      ttl:      The time to live of the cached entries [s]
+      subnet:   The subnet to be scanned when the cache is stale
+    '''
+
+    def __init__(self, path=DEFAULT_CACHE, ttl=DEFAULT_TTL, subnet=DEFAULT_SUBNET):
+        self.path = path
+        self.ttl = ttl
+        self.subnet = subnet
+        self._instruments = None    # model -> dictionary produced by identify()
+        self._timestamp = 0         # when the instruments were scanned
+
+    def lookup(self, model):
+        '''
+        Return the address of the model, scanning the network if the model
+        isn't in the cache, or if the cache has expired.
+        '''
+        if self._instruments is None: self._load()
+        if model not in self._instruments or self._expired(): self.rescan()
+        if model not in self._instruments:
+            raise KeyError(f"{__class__.__name__}.lookup: model not found in {self.subnet}: {model}")
+        return self._instruments[model]['ipaddr']
+
+    def connect(self, model, verbose=False):
+        '''
+        Return an instance of the Device subclass for the model. The cached address
+        is tried first, if the host responds to the portmapper probe. The network is
+        re-scanned if the host doesn't respond, if the connection fails, or if another
+        instrument responds at the address.
+        '''
+        import pyvisa
+        cls = device_class(model)
+        ipaddr = self.lookup(model)
+        if probe(ipaddr):
+            device = None
+            try:
+                device = cls(ipaddr, verbose)
+                if model in device.IDN(): return device
+            except (pyvisa.errors.VisaIOError, OSError):
+                pass
+            if device is not None:
+                try:
+                    device.instr().close()
+                except (pyvisa.errors.VisaIOError, OSError):
+                    pass
+        self.rescan()
+        return cls(self.lookup(model), verbose)
+
+    def rescan(self):
+        self._instruments = {idn['model']: idn for idn in scan(self.subnet)}
+        self._timestamp = time.time()
+        self._save()
+
+    def instruments(self):
+        if self._instruments is None: self._load()
+        return dict(self._instruments)
+
+    # ----------------------
+    # Implementation details
+    # ----------------------
+
+    def _expired(self):
+        return time.time() - self._timestamp > self.ttl
+
+    def _load(self):
+        self._instruments = {}
+        try:
+            with open(self.path) as f:
+                cache = json.load(f)
+            self._instruments = cache['instruments']
+            self._timestamp = cache['timestamp']
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'w') as f:
+            json.dump({'timestamp': self._timestamp, 'instruments': self._instruments}, f, indent=2)
+
+
+def connect(model, verbose=False, **kwargs):
+    '''
+    Connect to the model using the default registry. The optional keyword
+    arguments are passed to the constructor of the Registry.
+    '''
+    return Registry(**kwargs).connect(model, verbose)
@@ -0,0 +1,192 @@
+'''
+Recording and replaying SCPI sessions.
+
+A Recorder wraps a VISA resource (as returned by Device.instr()) and logs every
+operation with its timestamps, the argument and the response (including binary
+payloads) into a gzip-compressed stream of pickled records. A Replay serves
+the recorded responses back in the same order, either at the recorded pace
+or as fast as possible. It's meant to be passed into a Device in place of
+the VISA resource:
+
+    device = SDS1102X('10.0.0.111')
+    device.record('bench.rec')
+    ...
+    device.stop_recording()
+
+    device = SDS1102X('10.0.0.111', instr=Replay('bench.rec'))
+'''
+
+import gzip
+import pickle
+import time
+
+# The operations of a VISA resource that are recorded
+OPERATIONS = ('write', 'read', 'read_raw', 'query', 'query_binary_values')
+
+
+class Record:
+
+    '''
+    A single operation of a session.
+
+    Public instance members:
+      op:       The name of the operation
+      args:     The positional arguments of the operation
+      kwargs:   The keyword arguments of the operation
+      result:   The value returned by the operation
+      error:    The exception raised by the operation, or None
+      start:    When the operation was issued [s] since the beginning of the session
+      end:      When the operation completed [s] since the beginning of the session
+    '''
+
+    __slots__ = ('op', 'args', 'kwargs', 'result', 'start', 'end', 'error')
+
+    def __init__(self, op, args, kwargs, result, start, end, error=None):
+        self.op = op
+        self.args = args
+        self.kwargs = kwargs
+        self.result = result
+        self.start = start
+        self.end = end
+        self.error = error
+
+    def __getstate__(self):
+        return (self.op, self.args, self.kwargs, self.result, self.start, self.end, self.error)
+
+    def __setstate__(self, state):
+        self.op, self.args, self.kwargs, self.result, self.start, self.end, self.error = state
+
+    def __str__(self):
+        return f"{self.start:.6f} {self.end - self.start:.6f} {self.op}{self.args}"
+
+
+def load(path):
+    '''
+    Read all records of a session file into a list.
+    '''
+    records = []
+    with gzip.open(path, 'rb') as f:
+        while True:
+            try:
+                records.append(pickle.load(f))
+            except EOFError:
+                break
+    return records
+
+
+class Recorder:
+
+    '''
+    The wrapper of a VISA resource recording the operations into a file.
+    Other attributes of the resource (timeout, chunk_size, etc.) are passed
+    through unrecorded. The exceptions raised by the operations (e.g. timeouts)
+    are recorded as well, and raised again by the Replay.
+    '''
+
+    def __init__(self, instr, path):
+        self._instr = instr
+        self._file = gzip.open(path, 'wb', compresslevel=1)
+        self._t0 = time.perf_counter()
+
+    def __getattr__(self, name):
+        attr = getattr(self._instr, name)
+        if name not in OPERATIONS: return attr
+        def operation(*args, **kwargs):
+            start = time.perf_counter() - self._t0
+            try:
+                result = attr(*args, **kwargs)
+            except Exception as e:
+                self._dump(Record(name, args, kwargs, None, start, time.perf_counter() - self._t0, _picklable(e)))
+                raise
+            self._dump(Record(name, args, kwargs, result, start, time.perf_counter() - self._t0))
+            return result
+        return operation
+
+    def __setattr__(self, name, val):
+        if name.startswith('_'): object.__setattr__(self, name, val)
+        else: setattr(self._instr, name, val)
+
+    def detach(self):
+        '''
+        Finish the recording and return the wrapped resource, which is left open.
+        '''
+        if not self._file.closed: self._file.close()
+        return self._instr
+
+    def close(self):
+        self.detach().close()
+
+    # ----------------------
+    # Implementation details
+    # ----------------------
+
+    def _dump(self, record):
+        pickle.dump(record, self._file, pickle.HIGHEST_PROTOCOL)
+
+
+class Replay:
+
+    '''
+    The replacement of a VISA resource serving the responses of a recorded session.
+
+    Public instance members:
+      realtime: If True then each response is delayed until the time it was received
+                during the recording. Otherwise responses are returned immediately.
+      strict:   If True then the operations and their arguments (positional and keyword) must match
+                the recorded ones. Otherwise only the order of the operations is followed.
+      timeout:
+      chunk_size:
+                Accepted for compatibility with the VISA resources.
+    '''
+
+    def __init__(self, path, realtime=False, strict=True):
+        self.realtime = realtime
+        self.strict = strict
+        self.timeout = 2000
+        self.chunk_size = 20 * 1024
+        self.session = None
+        self._records = load(path)
+        self._next = 0
+        self._t0 = None
+
+    def __getattr__(self, name):
+        if name not in OPERATIONS:
+            raise AttributeError(f"{__class__.__name__}: unsupported attribute: {name}")
+        return lambda *args, **kwargs: self._serve(name, args, kwargs)
+
+    def rewind(self):
+        self._next = 0
+        self._t0 = None
+
+    def close(self): pass
+
+    # ----------------------
+    # Implementation details
+    # ----------------------
+
+    def _serve(self, op, args, kwargs):
+        context = f"{__class__.__name__}.{op}"
+        if self._next >= len(self._records):
+            raise EOFError(f"{context}: end of the recorded session")
+        record = self._records[self._next]
+        if self.strict and (record.op, record.args, record.kwargs) != (op, args, kwargs):
+            raise ValueError(f"{context}: operation #{self._next} mismatch, recorded: {record.op}{record.args}{record.kwargs}, requested: {op}{args}{kwargs}")
+        self._next += 1
+        if self.realtime:
+            now = time.perf_counter()
+            if self._t0 is None: self._t0 = now - record.start
+            delay = self._t0 + record.end - now
+            if delay > 0: time.sleep(delay)
+        if record.error is not None: raise record.error
+        return record.result
+
+
+def _picklable(e):
+    '''
+    Return the exception if it survives pickling, or a RuntimeError with its description.
+    '''
+    try:
+        pickle.loads(pickle.dumps(e, pickle.HIGHEST_PROTOCOL))
+        return e
+    except Exception:
+        return RuntimeError(f"{type(e).__name__}: {e}")
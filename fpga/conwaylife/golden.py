@@ -0,0 +1,217 @@
+'''
+The golden model of conwaylife.sv and the generator of the test vectors for golden_tb.sv.
+
+The board is the 256-bit vector of conwaylife.sv, where the cell (row, col) is the bit
+i = row * 16 + col. The board is kept as 16 packed uint16 rows, the bit 'col' of the row
+'row' being the cell. The neighbours follow the indexing of conwaylife.sv on the torus:
+
+    i_N  = (row + 1, col)       i_S  = (row - 1, col)
+    i_E  = (row, col - 1)       i_W  = (row, col + 1)
+    i_NE = (row + 1, col - 1)   i_SE = (row - 1, col - 1)
+    i_NW = (row + 1, col + 1)   i_SW = (row - 1, col + 1)
+
+A generation of any number of boards is computed at once with bitwise operations on
+the rows (one bit-plane per bit of the neighbour count).
+
+Generating the vectors and running the testbench:
+
+    python3 golden.py --vectors 4096 --generations 32 --pattern glider.txt --output vectors
+    cd vectors
+    iverilog -g2012 -I . -o golden_tb ../conwaylife.sv ../golden_tb.sv && vvp golden_tb
+
+The patterns are the bitmaps exported by fpga/tools/pixel_editor_html (the bottom-left
+16x16 pixels are used), and they are placed at random positions of the board.
+'''
+
+import argparse
+import numpy as np
+import os
+import sys
+import time
+
+SIZE = 16
+
+# A few well known patterns given as (row, col) of the live cells
+patterns = {
+    'blinker': [(0, 0), (0, 1), (0, 2)],
+    'block'  : [(0, 0), (0, 1), (1, 0), (1, 1)],
+    'glider' : [(0, 1), (1, 2), (2, 0), (2, 1), (2, 2)],
+    'toad'   : [(0, 1), (0, 2), (0, 3), (1, 0), (1, 1), (1, 2)],
+    'rpent'  : [(0, 1), (0, 2), (1, 0), (1, 1), (2, 1)],
+    'lwss'   : [(0, 1), (0, 4), (1, 0), (2, 0), (2, 4), (3, 0), (3, 1), (3, 2), (3, 3)]
+}
+
+
+# ----------
+# The models
+# ----------
+
+def _rotl(rows): return (rows << 1) | (rows >> (SIZE - 1))
+def _rotr(rows): return (rows >> 1) | (rows << (SIZE - 1))
+
+
+def step(boards):
+    '''
+    Compute the next generation of the boards given as an array of uint16 rows of
+    the shape (..., 16).
+    '''
+    N = np.roll(boards, -1, axis=-1)    # row + 1
+    S = np.roll(boards,  1, axis=-1)    # row - 1
+    neighbours = (N, _rotl(N), _rotl(boards), _rotl(S), S, _rotr(S), _rotr(boards), _rotr(N))
+
+    # The bit-sliced counter of the neighbours: ones, twos, fours and eights
+    ones  = np.zeros_like(boards)
+    twos  = np.zeros_like(boards)
+    fours = np.zeros_like(boards)
+    eight = np.zeros_like(boards)
+    for n in neighbours:
+        carry = ones & n
+        ones ^= n
+        carry, twos = twos & carry, twos ^ carry
+        carry, fours = fours & carry, fours ^ carry
+        eight |= carry
+
+    # sum == 3, or sum == 2 and alive
+    return twos & ~fours & ~eight & (ones | boards)
+
+
+def run(boards, generations):
+    '''
+    Return the array of the shape (generations, ...) of the consecutive generations
+    of the boards, not including the initial one.
+    '''
+    result = np.empty((generations,) + boards.shape, dtype=boards.dtype)
+    for g in range(generations):
+        boards = step(boards)
+        result[g] = boards
+    return result
+
+
+def step_reference(bits):
+    '''
+    Compute the next generation of the board given as a list of 256 bits, literally
+    following the indexing and the rules of conwaylife.sv.
+    '''
+    q = [0] * 256
+    for row in range(16):
+        for col in range(16):
+            i    = row * 16 + col
+            i_N  = (0 if row == 15 else row + 1) * 16 + col
+            i_NE = (0 if row == 15 else row + 1) * 16 + (15 if col ==  0 else col - 1)
+            i_E  = row * 16                          + (15 if col ==  0 else col - 1)
+            i_SE = (15 if row ==  0 else row - 1) * 16 + (15 if col ==  0 else col - 1)
+            i_S  = (15 if row ==  0 else row - 1) * 16 + col
+            i_SW = (15 if row ==  0 else row - 1) * 16 + (0 if col == 15 else col + 1)
+            i_W  = row * 16                          + (0 if col == 15 else col + 1)
+            i_NW = (0 if row == 15 else row + 1) * 16 + (0 if col == 15 else col + 1)
+            s = sum(bits[j] for j in (i_N, i_NE, i_E, i_SE, i_S, i_SW, i_W, i_NW))
+            q[i] = bits[i] if s == 2 else 1 if s == 3 else 0
+    return q
+
+
+# -----------------------------
+# Conversions of the board data
+# -----------------------------
+
+def to_bits(board):
+    return [(int(board[i // 16]) >> (i % 16)) & 1 for i in range(256)]
+
+
+def from_bits(bits):
+    return np.array([sum(bits[row * 16 + col] << col for col in range(16)) for row in range(16)], dtype=np.uint16)
+
+
+def to_hex(boards):
+    '''
+    Return the list of the 64-digit hex strings of the 256-bit vectors of the boards
+    given as an array of the shape (n, 16). The row 15 is the most significant.
+    '''
+    data = boards[:, ::-1].astype('>u2').tobytes()
+    return [data[i:i + 32].hex() for i in range(0, len(data), 32)]
+
+
+def load_bitmap(path):
+    '''
+    Load the bitmap exported by the pixel editor: the rows of '0' and '1', the top row
+    first. The pixel (x, y) of the bitmap becomes the cell (row=y, col=x), where y
+    is counted from the bottom row.
+    '''
+    with open(path) as f:
+        lines = [line.strip() for line in f if line.strip()]
+    cells = []
+    for y, line in enumerate(reversed(lines)):
+        for x, pixel in enumerate(line):
+            if pixel == '1' and x < SIZE and y < SIZE: cells.append((y, x))
+    return cells
+
+
+def place(cells, rng, count):
+    '''
+    Return an array of the shape (count, 16) of the boards with the pattern placed at
+    random positions of the torus.
+    '''
+    board = np.zeros((SIZE, SIZE), dtype=np.uint16)
+    for row, col in cells: board[row % SIZE, col % SIZE] = 1
+    boards = np.empty((count, SIZE), dtype=np.uint16)
+    for k, (dr, dc) in enumerate(rng.integers(0, SIZE, size=(count, 2))):
+        shifted = np.roll(board, (dr, dc), axis=(0, 1))
+        boards[k] = (shifted << np.arange(SIZE, dtype=np.uint16)).sum(axis=1, dtype=np.uint16)
+    return boards
+
+
+# ---------------------
+# The command line tool
+# ---------------------
+
+def check(rng, count):
+    '''
+    Compare the vectorized model with the reference one on random boards.
+    '''
+    boards = rng.integers(0, 1 << 16, size=(count, SIZE), dtype=np.uint16)
+    expected = np.array([from_bits(step_reference(to_bits(board))) for board in boards])
+    mismatches = int(np.count_nonzero((step(boards) != expected).any(axis=1)))
+    print(f"check: {count} boards, {mismatches} mismatches")
+    return mismatches == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--vectors', type=int, default=1024, help="the number of random boards")
+    parser.add_argument('--density', type=float, default=0.35, help="the density of the live cells of the random boards")
+    parser.add_argument('--pattern', action='append', default=[], help="the bitmap file exported by the pixel editor")
+    parser.add_argument('--placements', type=int, default=16, help="the number of placements of each pattern")
+    parser.add_argument('--generations', type=int, default=16, help="the number of the expected generations of each board")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='vectors', help="the directory for the generated files")
+    parser.add_argument('--check', type=int, default=256, metavar='N', help="cross-check the models on N boards first")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    if args.check and not check(rng, args.check): return 1
+
+    cells = (rng.random((args.vectors, SIZE, SIZE)) < args.density).astype(np.uint16)
+    boards = [(cells << np.arange(SIZE, dtype=np.uint16)).sum(axis=2, dtype=np.uint16)]
+    for name in list(patterns) + args.pattern:
+        pattern = patterns[name] if name in patterns else load_bitmap(name)
+        boards.append(place(pattern, rng, args.placements))
+    boards = np.concatenate(boards)
+
+    start = time.perf_counter()
+    expected = run(boards, args.generations)
+    elapsed = time.perf_counter() - start
+    print(f"{len(boards)} boards, {len(boards) * args.generations} generations in {elapsed:.3f} s")
+
+    os.makedirs(args.output, exist_ok=True)
+    with open(os.path.join(args.output, 'stimuli.mem'), 'w') as f:
+        f.write("\n".join(to_hex(boards)) + "\n")
+    with open(os.path.join(args.output, 'expected.mem'), 'w') as f:
+        # The generations of each board are consecutive
+        f.write("\n".join(to_hex(expected.swapaxes(0, 1).reshape(-1, SIZE))) + "\n")
+    with open(os.path.join(args.output, 'vectors.svh'), 'w') as f:
+        f.write(f"`define NUM_VECTORS {len(boards)}\n")
+        f.write(f"`define NUM_GENERATIONS {args.generations}\n")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,50 @@
+// Testbench checking conwaylife against the vectors generated by golden.py
+`include "vectors.svh"
+
+module golden_tb;
+
+  reg clk;
+  reg load;
+  reg [255:0] data;
+  wire [255:0] q;
+  int sum_out [255:0];
+  int i_out [255:0];
+  int i_N_out [255:0];
+
+  reg [255:0] stimuli [0:`NUM_VECTORS-1];
+  reg [255:0] expected [0:`NUM_VECTORS*`NUM_GENERATIONS-1];
+  int errors;
+
+  conwaylife life(.clk(clk),
+                  .load(load),
+                  .data(data),
+                  .q(q),
+                  .sum_out(sum_out),
+                  .i_out(i_out),
+                  .i_N_out(i_N_out));
+
+  always #1 clk = ~clk;
+
+  initial begin
+    $readmemh("stimuli.mem", stimuli);
+    $readmemh("expected.mem", expected);
+    clk = 0; load = 0; data = 256'h0; errors = 0;
+
+    for (int v = 0; v < `NUM_VECTORS; v = v + 1) begin
+      // The board is loaded at the next posedge
+      @(negedge clk) data = stimuli[v]; load = 1;
+      @(negedge clk) load = 0;
+      for (int g = 0; g < `NUM_GENERATIONS; g = g + 1) begin
+        @(negedge clk);
+        if (q !== expected[v * `NUM_GENERATIONS + g]) begin
+          errors = errors + 1;
+          if (errors <= 10)
+            $display("vector %0d generation %0d: q=%h expected=%h", v, g + 1, q, expected[v * `NUM_GENERATIONS + g]);
+        end
+      end
+    end
+    $display("%0d vectors, %0d generations, %0d errors", `NUM_VECTORS, `NUM_VECTORS * `NUM_GENERATIONS, errors);
+    $finish;
+  end
+
+endmodule